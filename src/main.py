@@ -1,13 +1,18 @@
 import discord
 from discord import app_commands, Embed
 import cohere
+import httpx
+import orjson
 import configparser
-import json
+import hashlib
 import asyncio
-from typing import Dict, List, Optional
+import functools
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
 import logging
-from dataclasses import dataclass
-from pathlib import Path
+from dataclasses import dataclass, field
 
 # ログの基本設定
 # フォーマット：[時刻] [モジュール名] [ログレベル] [メッセージ]
@@ -20,7 +25,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# 外部ライブラリの冗長なINFO/DEBUGログはWARNING以上のみ出力
+logging.getLogger('discord').setLevel(logging.WARNING)
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+@dataclass(slots=True)
 class Config:
     """設定管理クラス
     
@@ -36,18 +45,44 @@ class Config:
     discord_token: str
     master_admin_id: int
     admin_user_ids: List[int]
-    
+    _admin_set: frozenset = field(default_factory=frozenset, init=False)
+    _parser: Optional[configparser.ConfigParser] = field(default=None, init=False, repr=False)
+    _path: str = field(default='config/config.ini', init=False, repr=False)
+
+    def __post_init__(self):
+        self._admin_set = frozenset(self.admin_user_ids)
+
+    def write(self, key: str, value: str) -> None:
+        """キャッシュ済みのパーサーを更新して設定ファイルへ書き込み
+
+        Args:
+            key: 更新する設定キー
+            value: 新しい設定値
+        """
+        if self._parser is None:
+            self._parser = configparser.ConfigParser()
+            self._parser.read(self._path, encoding='utf-8')
+        self._parser['DEFAULT'][key] = value
+
+        with open(self._path, 'w', encoding='utf-8') as f:
+            self._parser.write(f)
+
+    def set_admin_user_ids(self, admin_user_ids: List[int]) -> None:
+        """管理者USER IDのリストを更新し、検索用セットを再構築"""
+        self.admin_user_ids = admin_user_ids
+        self._admin_set = frozenset(admin_user_ids)
+
     def is_admin(self, user_id: int) -> bool:
         """ユーザーが管理者権限を持っているか確認
-        
+
         Args:
             user_id: 確認するUSER ID
-            
+
         Returns:
             bool: 管理者権限を持っている場合True
         """
-        return user_id == self.master_admin_id or user_id in self.admin_user_ids
-    
+        return user_id == self.master_admin_id or user_id in self._admin_set
+
     @classmethod
     def load(cls, path: str = 'config/config.ini') -> 'Config':
         """設定ファイルを読み込み、Configインスタンスを生成
@@ -68,98 +103,446 @@ class Config:
         
         try:
             admin_ids_str = config['DEFAULT'].get('ADMIN_USER_IDS', '[]')
-            admin_ids = json.loads(admin_ids_str)
-            return cls(
+            admin_ids = orjson.loads(admin_ids_str)
+            instance = cls(
                 cohere_api_key=config['DEFAULT']['COHERE_API_KEY'],
                 discord_token=config['DEFAULT']['DISCORD_TOKEN'],
                 master_admin_id=int(config['DEFAULT']['MASTER_ADMIN_ID']),
                 admin_user_ids=admin_ids
             )
+            # 解析済みパーサーを保持し、更新時の再読み込みを不要にする
+            instance._parser = config
+            instance._path = path
+            return instance
         except KeyError as e:
             raise ValueError(f"必要な設定項目がありません: {e}")
         except ValueError as e:
             raise ValueError(f"設定値が不正です: {e}")
 
+@dataclass(slots=True)
+class UserState:
+    """ユーザーごとの会話状態
+
+    Attributes:
+        history (Deque[dict]): ホット層の会話履歴
+        ephemeral (bool): メッセージ表示設定
+        archive_summary (str): アーカイブ層の要約テキスト
+        pending_archive (List[dict]): アーカイブ待ちのメッセージ
+        state_hash: 会話状態のローリングハッシュ（キャッシュキー用）
+    """
+    history: Deque[dict]
+    ephemeral: bool = True
+    archive_summary: str = ''
+    pending_archive: List[dict] = field(default_factory=list)
+    state_hash: Optional[object] = None
+
 class ConversationManager:
     """会話履歴とユーザー設定の管理クラス
-    
-    ユーザーごとの会話履歴と表示設定を管理
+
+    ユーザーごとの会話状態をUserStateに集約して管理
+
+    履歴は2層構造で保持する：
+    - ホット層：直近のメッセージをそのまま保持するdeque
+    - アーカイブ層：ホット層から溢れた古いメッセージの要約テキスト
     """
+
+    __slots__ = ('users',)
+
+    # ホット層に保持する直近メッセージ数
+    HOT_MAXLEN = 16
+
     def __init__(self):
-        self.conversations: Dict[int, List[dict]] = {}
-        self.ephemeral_settings: Dict[int, bool] = {}
-    
+        self.users: Dict[int, UserState] = {}
+
+    def _get_state(self, user_id: int) -> UserState:
+        """ユーザーの状態を取得（なければ生成）"""
+        state = self.users.get(user_id)
+        if state is None:
+            state = self.users[user_id] = UserState(history=deque(maxlen=self.HOT_MAXLEN))
+        return state
+
+    @staticmethod
+    def _update_state_hash(state: UserState, data) -> None:
+        """会話状態のローリングハッシュを差分更新"""
+        if state.state_hash is None:
+            state.state_hash = hashlib.blake2b(digest_size=16)
+        state.state_hash.update(orjson.dumps(data))
+
+    def get_state_key(self, user_id: int) -> str:
+        """現在の会話状態を表すキャッシュキーを取得"""
+        state = self.users.get(user_id)
+        if state is None or state.state_hash is None:
+            return ''
+        return state.state_hash.hexdigest()
+
+    def _append(self, state: UserState, message: dict) -> None:
+        """ホット層にメッセージを追加（満杯時は最古をアーカイブ待ちに退避）"""
+        if len(state.history) == self.HOT_MAXLEN:
+            state.pending_archive.append(state.history.popleft())
+        state.history.append(message)
+        self._update_state_hash(state, message)
+
+    @staticmethod
+    def _build_from_state(state: UserState, system_message: dict) -> List[dict]:
+        """状態からCohereへ送信するメッセージリストを構築"""
+        if state.archive_summary:
+            return [
+                system_message,
+                {"role": "system", "content": f"[これまでの会話の要約] {state.archive_summary}"},
+                *state.history
+            ]
+        return [system_message, *state.history]
+
     def add_message(self, user_id: int, message: dict) -> None:
-        """会話履歴にメッセージを追加"""
-        if user_id not in self.conversations:
-            self.conversations[user_id] = []
-        self.conversations[user_id].append(message)
-    
+        """会話履歴にメッセージを追加
+
+        ホット層が満杯の場合は最古のメッセージをアーカイブ待ちに退避
+        """
+        self._append(self._get_state(user_id), message)
+
+    def prepare_request(self, user_id: int, message: dict, system_message: dict) -> Tuple[bool, List[dict]]:
+        """メッセージ追加とリクエスト構築を1回の状態取得でまとめて実行
+
+        Args:
+            user_id: 対象のUSER ID
+            message: 追加するユーザーメッセージ
+            system_message: 先頭に置くシステムプロンプトのメッセージ
+
+        Returns:
+            Tuple[bool, List[dict]]: 表示設定とCohereへ送信するメッセージリスト
+        """
+        state = self._get_state(user_id)
+        self._append(state, message)
+        return state.ephemeral, self._build_from_state(state, system_message)
+
+    def has_pending_archive(self, user_id: int) -> bool:
+        """アーカイブ待ちのメッセージがあるか確認"""
+        state = self.users.get(user_id)
+        return bool(state and state.pending_archive)
+
+    def take_pending_archive(self, user_id: int) -> List[dict]:
+        """アーカイブ待ちのメッセージを取り出してクリア"""
+        state = self.users.get(user_id)
+        if state is None:
+            return []
+        pending = state.pending_archive
+        state.pending_archive = []
+        return pending
+
+    def requeue_pending_archive(self, user_id: int, messages: List[dict]) -> None:
+        """要約に失敗したメッセージをアーカイブ待ちに戻す"""
+        self._get_state(user_id).pending_archive[:0] = messages
+
+    def get_archive_summary(self, user_id: int) -> str:
+        """アーカイブ層の要約を取得"""
+        state = self.users.get(user_id)
+        return state.archive_summary if state else ''
+
+    def set_archive_summary(self, user_id: int, summary: str) -> None:
+        """アーカイブ層の要約を更新"""
+        state = self._get_state(user_id)
+        state.archive_summary = summary
+        self._update_state_hash(state, summary)
+
+    def build_messages(self, user_id: int, system_message: dict) -> List[dict]:
+        """Cohereへ送信するメッセージリストを1回のリスト構築で生成
+
+        Args:
+            user_id: 対象のUSER ID
+            system_message: 先頭に置くシステムプロンプトのメッセージ
+
+        Returns:
+            List[dict]: システムプロンプト＋アーカイブ要約＋ホット層の履歴
+        """
+        state = self.users.get(user_id)
+        if state is None:
+            return [system_message]
+        return self._build_from_state(state, system_message)
+
     def get_conversation(self, user_id: int) -> List[dict]:
-        """ユーザーの会話履歴を取得"""
-        return self.conversations.get(user_id, [])
-    
+        """ユーザーの会話履歴を取得（アーカイブ要約＋ホット層）"""
+        state = self.users.get(user_id)
+        if state is None:
+            return []
+        if state.archive_summary:
+            return [
+                {"role": "system", "content": f"[これまでの会話の要約] {state.archive_summary}"},
+                *state.history
+            ]
+        return list(state.history)
+
     def reset_conversation(self, user_id: int) -> None:
-        """会話履歴をリセット"""
-        self.conversations[user_id] = []
-    
+        """会話履歴をリセット（アーカイブ層も含む、表示設定は保持）"""
+        state = self.users.get(user_id)
+        if state is None:
+            return
+        state.history.clear()
+        state.pending_archive = []
+        state.archive_summary = ''
+        state.state_hash = None
+
+    def clear_all_conversations(self) -> None:
+        """全ユーザーの会話履歴とアーカイブをクリア（表示設定は保持）"""
+        for user_id in self.users:
+            self.reset_conversation(user_id)
+
     def get_ephemeral_setting(self, user_id: int) -> bool:
         """メッセージ表示設定を取得"""
-        return self.ephemeral_settings.get(user_id, True)
-    
+        state = self.users.get(user_id)
+        return state.ephemeral if state else True
+
     def set_ephemeral_setting(self, user_id: int, setting: bool) -> None:
         """メッセージ表示設定を更新"""
-        self.ephemeral_settings[user_id] = setting
+        self._get_state(user_id).ephemeral = setting
 
 class ChatBot(discord.Client):
     """WestAIのクラス"""
+
+    # 応答キャッシュの上限（LRUで古いものから破棄）
+    CHAT_CACHE_SIZE = 512
+
+    # fetch_userで取得したユーザー情報の保持時間（秒）
+    # 表示名の変更が反映されるよう長すぎない値にする
+    USER_CACHE_TTL = 300
+
+    # 同時に実行するCohere API呼び出しの上限
+    MAX_CONCURRENT_CHATS = 16
+
     def __init__(self):
         intents = discord.Intents.all()
         super().__init__(intents=intents)
-        
-        self.config = Config.load()
+
         self.tree = app_commands.CommandTree(self)
-        self.cohere_client = cohere.ClientV2(api_key=self.config.cohere_api_key)
         self.conversation_manager = ConversationManager()
-        
-        self.system_prompt = self._load_system_prompt()
-    
-    def _load_system_prompt(self) -> str:
-        """システムプロンプトをファイルから読み込み"""
+
+        # 同一会話状態への重複リクエストをまとめるためのキャッシュ
+        self._chat_cache: OrderedDict[str, Tuple[str, dict]] = OrderedDict()
+        self._chat_futures: Dict[str, asyncio.Future] = {}
+
+        # fetch_userの結果をTTL付きで保持するキャッシュ
+        self._user_cache: Dict[int, Tuple[float, discord.User]] = {}
+
+        # バースト時にAPIクォータを使い切らないよう同時実行数を制限
+        self._chat_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CHATS)
+
+        # 設定ファイルへの書き込みを直列化するロック
+        self._config_lock = asyncio.Lock()
+
+    async def get_or_fetch_user(self, user_id: int) -> discord.User:
+        """ユーザー情報をキャッシュ優先で取得
+
+        ローカルのメンバーキャッシュ、次にTTL付きキャッシュを確認し、
+        どちらにもなければDiscord REST APIから取得してキャッシュする
+
+        Args:
+            user_id: 取得するUSER ID
+
+        Returns:
+            discord.User: 取得したユーザー情報
+        """
+        user = self.get_user(user_id)
+        if user is not None:
+            return user
+
+        cached = self._user_cache.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < self.USER_CACHE_TTL:
+            return cached[1]
+
+        user = await self.fetch_user(user_id)
+        self._user_cache[user_id] = (time.monotonic(), user)
+        return user
+
+    @functools.cached_property
+    def config(self) -> Config:
+        """設定を初回アクセス時に読み込み"""
+        return Config.load()
+
+    @functools.cached_property
+    def _httpx_client(self) -> httpx.AsyncClient:
+        """Cohereクライアント間で共有するコネクションプール
+
+        キープアライブ接続を維持し、リクエストごとの
+        TCP/TLSハンドシェイクを省略する
+        """
+        limits = httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=100,
+            keepalive_expiry=30.0
+        )
+        return httpx.AsyncClient(limits=limits, timeout=None)
+
+    @functools.cached_property
+    def cohere_client(self) -> cohere.AsyncClientV2:
+        """Cohereクライアントを初回アクセス時に生成"""
+        return cohere.AsyncClientV2(
+            api_key=self.config.cohere_api_key,
+            httpx_client=self._httpx_client
+        )
+
+    @staticmethod
+    def _chat_cache_key(messages: List[dict]) -> str:
+        """会話状態全体からキャッシュキーを生成"""
+        payload = orjson.dumps(messages, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(payload).hexdigest()
+
+    async def cached_chat(self, messages: List[dict], on_partial=None,
+                          key: Optional[str] = None) -> Tuple[str, dict]:
+        """Cohere APIをキャッシュ付きのストリーミングで呼び出し
+
+        同一の会話状態＋プロンプトに対するリクエストはキャッシュから返し、
+        進行中のリクエストがあれば同じFutureを待つことで重複API呼び出しを防ぐ
+
+        Args:
+            messages: Cohereに送信するメッセージリスト
+            on_partial: 受信途中のテキストを受け取るコールバック（任意）
+            key: 事前計算済みのキャッシュキー（省略時はmessagesから算出）
+
+        Returns:
+            Tuple[str, dict]: 応答テキストとToken使用量情報
+        """
+        key = key or self._chat_cache_key(messages)
+
+        if key in self._chat_cache:
+            self._chat_cache.move_to_end(key)
+            return self._chat_cache[key]
+
+        # 同じリクエストが進行中なら結果を共有
+        if key in self._chat_futures:
+            return await asyncio.shield(self._chat_futures[key])
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._chat_futures[key] = future
+
         try:
-            with open('assistant/prompt.json', 'r', encoding='utf-8') as f:
-                return json.load(f)['system_prompt']
+            # 現行最新モデルのCMDR+ 24-08をストリーミングで受信
+            chunks: List[str] = []
+            token_info = {'input': 0, 'output': 0}
+            async with self._chat_semaphore:
+                async for event in self.cohere_client.chat_stream(
+                    model="command-r-plus-08-2024",
+                    messages=messages
+                ):
+                    if event.type == 'content-delta':
+                        chunks.append(event.delta.message.content.text)
+                        if on_partial:
+                            await on_partial(''.join(chunks))
+                    elif event.type == 'message-end':
+                        usage = event.delta.usage
+                        token_info = {
+                            'input': usage.tokens.input_tokens,
+                            'output': usage.tokens.output_tokens
+                        }
+
+            content = ''.join(chunks)
+            result = (content, token_info)
+
+            self._chat_cache[key] = result
+            if len(self._chat_cache) > self.CHAT_CACHE_SIZE:
+                self._chat_cache.popitem(last=False)
+
+            future.set_result(result)
+            return result
         except Exception as e:
-            logger.error(f"プロンプトファイルの読み込みに失敗: {e}")
+            future.set_exception(e)
+            future.exception()  # 待機者がいない場合の未取得警告を抑制
+            raise
+        finally:
+            self._chat_futures.pop(key, None)
+            if not future.done():
+                future.cancel()
+
+    async def archive_history(self, user_id: int) -> None:
+        """ホット層から溢れたメッセージをアーカイブ要約に統合
+
+        退避されたメッセージを既存の要約とあわせてCohereで要約し直し、
+        ユーザーごとのメモリ使用量と毎回送信するToken量を一定に保つ
+
+        Args:
+            user_id: 対象のUSER ID
+        """
+        pending = self.conversation_manager.take_pending_archive(user_id)
+        if not pending:
+            return
+
+        current_summary = self.conversation_manager.get_archive_summary(user_id)
+        summary_request = [
+            {"role": "system", "content": "これまでの要約と新しい会話を統合し、要点を簡潔に日本語でまとめてください。"},
+            {"role": "user", "content": orjson.dumps(
+                {'これまでの要約': current_summary, '新しい会話': pending}
+            ).decode()}
+        ]
+        try:
+            response = await self.cohere_client.chat(
+                model="command-r-plus-08-2024",
+                messages=summary_request
+            )
+            first = response.message.content[0]
+            summary = getattr(first, 'text', response.message.content)
+            self.conversation_manager.set_archive_summary(user_id, summary)
+        except Exception as e:
+            logger.error("会話履歴のアーカイブに失敗: %s", e)
+            # 次回のアーカイブで再試行できるよう退避メッセージを戻す
+            self.conversation_manager.requeue_pending_archive(user_id, pending)
+
+    @functools.cached_property
+    def system_prompt(self) -> str:
+        """システムプロンプトを初回アクセス時にファイルから読み込み"""
+        try:
+            with open('assistant/prompt.json', 'rb') as f:
+                return orjson.loads(f.read())['system_prompt']
+        except Exception as e:
+            logger.error("プロンプトファイルの読み込みに失敗: %s", e)
             #　読み取れなかった場合の考慮            
             return "親切なAIアシスタントとして振る舞ってください。"
 
+    @functools.cached_property
+    def system_message(self) -> dict:
+        """システムプロンプトのメッセージ（事前構築して全リクエストで再利用）"""
+        return {"role": "system", "content": self.system_prompt}
+
     async def update_config(self, key: str, value: str) -> None:
         """設定を更新してファイルに保存"""
         try:
-            config = configparser.ConfigParser()
-            config.read('config/config.ini', encoding='utf-8')
-            config['DEFAULT'][key] = value
-            
-            with open('config/config.ini', 'w', encoding='utf-8') as f:
-                config.write(f)
-                
-            # 設定値をメモリ上でも更新
-            if key == 'COHERE_API_KEY':
-                self.cohere_client = cohere.ClientV2(api_key=value)
-                self.config.cohere_api_key = value
-            elif key == 'ADMIN_USER_IDS':
-                self.config.admin_user_ids = json.loads(value)
-                
+            # 同時更新で書き込みが競合しないよう直列化
+            async with self._config_lock:
+                # 値が変わらない場合はファイル書き込みを省略
+                if key == 'COHERE_API_KEY' and value == self.config.cohere_api_key:
+                    return
+                if key == 'ADMIN_USER_IDS' and set(orjson.loads(value)) == set(self.config.admin_user_ids):
+                    return
+
+                # ファイルI/Oはイベントループをブロックしないよう別スレッドで実行
+                await asyncio.to_thread(self.config.write, key, value)
+
+                # 設定値をメモリ上でも更新
+                if key == 'COHERE_API_KEY':
+                    # コネクションプールは再利用し、確立済みのTLS接続を維持
+                    self.cohere_client = cohere.AsyncClientV2(
+                        api_key=value,
+                        httpx_client=self._httpx_client
+                    )
+                    self.config.cohere_api_key = value
+                elif key == 'ADMIN_USER_IDS':
+                    self.config.set_admin_user_ids(orjson.loads(value))
+
         except Exception as e:
             raise RuntimeError(f"設定の更新に失敗: {e}")
 
+    @staticmethod
+    def _write_prompt_sync(new_prompt: str) -> None:
+        """プロンプトファイルへの書き込み（ワーカースレッドで実行）"""
+        with open('assistant/prompt.json', 'wb') as f:
+            f.write(orjson.dumps({'system_prompt': new_prompt}, option=orjson.OPT_INDENT_2))
+
     async def update_system_prompt(self, new_prompt: str) -> None:
         """システムプロンプトを更新"""
         try:
-            with open('assistant/prompt.json', 'w', encoding='utf-8') as f:
-                json.dump({'system_prompt': new_prompt}, f, ensure_ascii=False, indent=2)
+            # ファイルI/Oはイベントループをブロックしないよう別スレッドで実行
+            await asyncio.to_thread(self._write_prompt_sync, new_prompt)
             self.system_prompt = new_prompt
+            self.system_message = {"role": "system", "content": new_prompt}
+            # 旧プロンプト前提の応答を返さないようキャッシュを破棄
+            self._chat_cache.clear()
         except Exception as e:
             raise RuntimeError(f"システムプロンプトの更新に失敗: {e}")
 
@@ -168,126 +551,171 @@ class ChatBot(discord.Client):
 
 class ChatCommands(app_commands.Group):
     """Discordスラッシュコマンドの管理クラス"""
+
+    # 埋め込みメッセージの色（毎回int('56F0FA', 16)を解析しない）
+    _COLOR = 0x56F0FA
+
+    # Token使用量フッターのテンプレート（束縛済みformatメソッド）
+    _FOOTER = "Token使用量: 入力 {input}, 出力 {output}".format
+
+    # ストリーミング中のメッセージ編集間隔（秒）
+    # Discordのレートリミット（5回/5秒）に収まるよう余裕を持たせる
+    STREAM_EDIT_INTERVAL = 1.0
+
     def __init__(self, bot: ChatBot):
         super().__init__(name="chat", description="チャットコマンド")
         self.bot = bot
-    
-    async def _create_response_embed(self, content: str, token_info: Optional[dict] = None) -> Embed:
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _const_embed(content: str) -> Embed:
+        """固定文言の埋め込みメッセージをキャッシュから取得"""
+        return Embed(description=content, color=ChatCommands._COLOR)
+
+    def _create_response_embed(self, content: str, token_info: Optional[dict] = None) -> Embed:
         """埋め込みメッセージの作成"""
-        embed = Embed(description=content, color=int('56F0FA', 16))
+        embed = Embed(description=content, color=self._COLOR)
         if token_info:
-            embed.set_footer(text=f"Token使用量: 入力 {token_info['input']}, 出力 {token_info['output']}")
+            embed.set_footer(text=self._FOOTER(**token_info))
         return embed
 
     @app_commands.command(name="list_admins", description="現在の管理者リストを表示 (マスター管理者のみ)")
     async def list_admins(self, interaction: discord.Interaction):
         """管理者リスト表示コマンド"""
         if interaction.user.id != self.bot.config.master_admin_id:
-            embed = await self._create_response_embed("このコマンドはマスター管理者のみ実行できます。")
+            embed = self._const_embed("このコマンドはマスター管理者のみ実行できます。")
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
         try:
             # マスター管理者とその他の管理者を分けて表示
             admin_list = ["管理者リスト:"]
-            
-            # マスター管理者のユーザー情報を取得
-            master_user = await self.bot.fetch_user(self.bot.config.master_admin_id)
-            master_name = master_user.name if master_user else "Unknown"
+
+            # マスター管理者と他の管理者のユーザー情報を並列で取得
+            admin_ids = self.bot.config.admin_user_ids
+            master_user, *admin_users = await asyncio.gather(
+                self.bot.get_or_fetch_user(self.bot.config.master_admin_id),
+                *(self.bot.get_or_fetch_user(admin_id) for admin_id in admin_ids),
+                return_exceptions=True
+            )
+            master_name = master_user.name if isinstance(master_user, discord.User) else "Unknown"
             admin_list.append(f"\nマスター管理者:\n• {self.bot.config.master_admin_id} ({master_name})")
-            
-            if self.bot.config.admin_user_ids:
+
+            if admin_ids:
                 admin_list.append("\nその他の管理者:")
-                for admin_id in self.bot.config.admin_user_ids:
-                    user = await self.bot.fetch_user(admin_id)
-                    user_name = user.name if user else "Unknown"
+                for admin_id, user in zip(admin_ids, admin_users):
+                    user_name = user.name if isinstance(user, discord.User) else "Unknown"
                     admin_list.append(f"• {admin_id} ({user_name})")
             else:
                 admin_list.append("\nその他の管理者: なし")
 
-            embed = await self._create_response_embed("\n".join(admin_list))
+            embed = self._create_response_embed("\n".join(admin_list))
             await interaction.response.send_message(embed=embed, ephemeral=True)
             
         except Exception as e:
-            logger.error(f"管理者リスト表示でエラー発生: {e}")
-            embed = await self._create_response_embed("管理者リストの表示に失敗しました。")
+            logger.error("管理者リスト表示でエラー発生: %s", e)
+            embed = self._const_embed("管理者リストの表示に失敗しました。")
             await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="send", description="WestAIにメッセージを送信")
     async def send(self, interaction: discord.Interaction, message: str):
         """メッセージ送信コマンド"""
-        is_ephemeral = self.bot.conversation_manager.get_ephemeral_setting(interaction.user.id)
+        # ホットパスの属性参照をローカル変数に束ねる
+        bot = self.bot
+        conversation_manager = bot.conversation_manager
+        user_id = interaction.user.id
+
+        # 表示設定の取得・メッセージ追加・ペイロード構築を1回の状態取得で実行
+        is_ephemeral, messages = conversation_manager.prepare_request(
+            user_id,
+            {"role": "user", "content": message},
+            bot.system_message
+        )
         await interaction.response.defer(ephemeral=is_ephemeral, thinking=False)
-        
+
         try:
-            self.bot.conversation_manager.add_message(
-                interaction.user.id,
-                {"role": "user", "content": message}
-            )
-            
-            messages = [{"role": "system", "content": self.bot.system_prompt}]
-            messages.extend(self.bot.conversation_manager.get_conversation(interaction.user.id))
-            
-            # 現行最新モデルのCMDR+ 24-08
-            response = self.bot.cohere_client.chat(
-                model="command-r-plus-08-2024",
-                messages=messages
+            # ストリーミング受信中は途中経過で埋め込みを定期的に更新
+            stream_message: Optional[discord.WebhookMessage] = None
+            last_edit = 0.0
+
+            async def on_partial(text: str) -> None:
+                nonlocal stream_message, last_edit
+                now = time.monotonic()
+                if stream_message is None:
+                    stream_message = await interaction.followup.send(
+                        embed=self._create_response_embed(text),
+                        ephemeral=is_ephemeral,
+                        wait=True
+                    )
+                    last_edit = now
+                elif now - last_edit >= self.STREAM_EDIT_INTERVAL:
+                    last_edit = now
+                    await stream_message.edit(embed=self._create_response_embed(text))
+
+            content, token_info = await bot.cached_chat(
+                messages,
+                on_partial=on_partial,
+                key=conversation_manager.get_state_key(user_id)
             )
-            
-            content = response.message.content[0].text if hasattr(response.message.content[0], 'text') else response.message.content
-            
-            self.bot.conversation_manager.add_message(
-                interaction.user.id,
+
+            conversation_manager.add_message(
+                user_id,
                 {"role": "assistant", "content": content}
             )
-            
-            # 使用されたToken数の取得
-            token_info = {
-                'input': response.usage.tokens.input_tokens,
-                'output': response.usage.tokens.output_tokens
-            }
-            
-            embed = await self._create_response_embed(content, token_info)
-            await interaction.followup.send(embed=embed, ephemeral=is_ephemeral)
-            
+
+            # ホット層から溢れたメッセージをバックグラウンドで要約に統合
+            if conversation_manager.has_pending_archive(user_id):
+                asyncio.create_task(bot.archive_history(user_id))
+
+            embed = self._create_response_embed(content, token_info)
+            if stream_message is not None:
+                await stream_message.edit(embed=embed)
+            else:
+                # キャッシュヒット時はストリーミングが発生しないため一括送信
+                await interaction.followup.send(embed=embed, ephemeral=is_ephemeral)
+
         except Exception as e:
-            logger.error(f"チャットコマンドでエラー発生: {e}")
-            error_embed = await self._create_response_embed("エラーが発生しました。後でもう一度お試しください。")
+            logger.error("チャットコマンドでエラー発生: %s", e)
+            error_embed = self._const_embed("エラーが発生しました。後でもう一度お試しください。")
             await interaction.followup.send(embed=error_embed, ephemeral=is_ephemeral)
 
     @app_commands.command(name="reset", description="会話履歴をリセット")
     async def reset(self, interaction: discord.Interaction):
         """コンテキスト（会話履歴）リセットコマンド"""
         is_ephemeral = self.bot.conversation_manager.get_ephemeral_setting(interaction.user.id)
+        # 先にACKを返し、応答本体はfollowupでパイプライン化
+        await interaction.response.defer(ephemeral=is_ephemeral)
         self.bot.conversation_manager.reset_conversation(interaction.user.id)
-        
-        embed = await self._create_response_embed("会話履歴をリセットしました。")
-        await interaction.response.send_message(embed=embed, ephemeral=is_ephemeral)
+
+        embed = self._const_embed("会話履歴をリセットしました。")
+        await interaction.followup.send(embed=embed, ephemeral=is_ephemeral)
 
     @app_commands.command(name="settings", description="メッセージの表示設定を変更")
     async def settings(self, interaction: discord.Interaction, ephemeral: bool):
         """表示設定変更コマンド"""
+        # 先にACKを返し、応答本体はfollowupでパイプライン化
+        await interaction.response.defer(ephemeral=True)
         self.bot.conversation_manager.set_ephemeral_setting(interaction.user.id, ephemeral)
         status = "非公開" if ephemeral else "公開"
-        
-        embed = await self._create_response_embed(f"メッセージ表示設定を{status}に変更しました。")
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+        embed = self._create_response_embed(f"メッセージ表示設定を{status}に変更しました。")
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
     @app_commands.command(name="update_key", description="Cohere APIキーを更新 (マスター管理者のみ)")
     async def update_key(self, interaction: discord.Interaction, api_key: str):
         """こーひーAPIキーの更新 (ワイのみ)"""
         if interaction.user.id != self.bot.config.master_admin_id:
-            embed = await self._create_response_embed("このコマンドはマスター管理者のみ実行できます。")
+            embed = self._const_embed("このコマンドはマスター管理者のみ実行できます。")
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
         await interaction.response.defer(ephemeral=True)
         try:
             await self.bot.update_config('COHERE_API_KEY', api_key)
-            embed = await self._create_response_embed("APIキーを更新しました。")
+            embed = self._const_embed("APIキーを更新しました。")
         except Exception as e:
-            logger.error(f"APIキー更新でエラー発生: {e}")
-            embed = await self._create_response_embed("APIキーの更新に失敗しました。")
+            logger.error("APIキー更新でエラー発生: %s", e)
+            embed = self._const_embed("APIキーの更新に失敗しました。")
         
         await interaction.followup.send(embed=embed, ephemeral=True)
 
@@ -295,7 +723,7 @@ class ChatCommands(app_commands.Group):
     async def add_admin(self, interaction: discord.Interaction, user_id: str, add: bool):
         """管理者追加・削除コマンド"""
         if interaction.user.id != self.bot.config.master_admin_id:
-            embed = await self._create_response_embed("このコマンドはマスター管理者のみ実行できます。")
+            embed = self._const_embed("このコマンドはマスター管理者のみ実行できます。")
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
@@ -308,15 +736,15 @@ class ChatCommands(app_commands.Group):
             else:
                 current_admins.discard(admin_id)
             
-            await self.bot.update_config('ADMIN_USER_IDS', json.dumps(list(current_admins)))
+            await self.bot.update_config('ADMIN_USER_IDS', orjson.dumps(list(current_admins)).decode())
             action = "追加" if add else "削除"
-            embed = await self._create_response_embed(f"管理者を{action}しました。")
+            embed = self._create_response_embed(f"管理者を{action}しました。")
             
         except ValueError:
-            embed = await self._create_response_embed("無効なユーザーIDです。")
+            embed = self._const_embed("無効なユーザーIDです。")
         except Exception as e:
-            logger.error(f"管理者更新でエラー発生: {e}")
-            embed = await self._create_response_embed("管理者の更新に失敗しました。")
+            logger.error("管理者更新でエラー発生: %s", e)
+            embed = self._const_embed("管理者の更新に失敗しました。")
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -324,7 +752,7 @@ class ChatCommands(app_commands.Group):
     async def update_system_prompt(self, interaction: discord.Interaction, prompt: str, reset_conversations: bool = False):
         """システムプロンプト更新コマンド (デフォルト履歴消去無効)"""
         if not self.bot.config.is_admin(interaction.user.id):
-            embed = await self._create_response_embed("このコマンドは管理者のみ実行できます。")
+            embed = self._const_embed("このコマンドは管理者のみ実行できます。")
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
@@ -333,16 +761,16 @@ class ChatCommands(app_commands.Group):
             await self.bot.update_system_prompt(prompt)
             
             if reset_conversations:
-                self.bot.conversation_manager.conversations.clear()
+                self.bot.conversation_manager.clear_all_conversations()
                 message = "システムプロンプトを更新し、全ユーザーの会話履歴をリセットしました。"
             else:
                 message = "システムプロンプトを更新しました。"
                 
-            embed = await self._create_response_embed(message)
+            embed = self._create_response_embed(message)
             
         except Exception as e:
-            logger.error(f"システムプロンプト更新でエラー発生: {e}")
-            embed = await self._create_response_embed("システムプロンプトの更新に失敗しました。")
+            logger.error("システムプロンプト更新でエラー発生: %s", e)
+            embed = self._const_embed("システムプロンプトの更新に失敗しました。")
         
         await interaction.followup.send(embed=embed, ephemeral=True)
 
@@ -357,8 +785,15 @@ async def main():
         bot.tree.add_command(ChatCommands(bot))
         await bot.start(bot.config.discord_token)
     except Exception as e:
-        logger.error(f"WestAIの起動に失敗: {e}")
+        logger.error("WestAIの起動に失敗: %s", e)
         raise
 
 if __name__ == "__main__":
+    # uvloopが利用可能な環境では低オーバーヘッドなイベントループに切り替え
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
     asyncio.run(main())
\ No newline at end of file